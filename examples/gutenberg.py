@@ -1,6 +1,10 @@
-import json
-import requests
-from openai import OpenAI
+import asyncio
+import importlib.util
+import string
+import httpx
+from openai import AsyncOpenAI
+
+from src.brainstorm import _json
 
 import os
 from dotenv import load_dotenv
@@ -13,31 +17,61 @@ load_dotenv()
 # Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = "google/gemini-2.0-flash-001"
-openai_client = OpenAI(
+openai_client = AsyncOpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=OPENROUTER_API_KEY,
 )
 
-# Initial message setup
-task = "What are the titles of some James Joyce books?"
-messages = [
-    {"role": "system", "content": "You are a helpful assistant."},
-    {"role": "user", "content": task}
-]
+# Shared HTTP client for tool calls, so every search reuses a pooled
+# keep-alive connection instead of a fresh TCP + TLS handshake
+http_client = httpx.AsyncClient(
+    http2=importlib.util.find_spec("h2") is not None,
+    limits=httpx.Limits(max_keepalive_connections=20),
+    timeout=10,
+)
+
+# Initial task
+TASK = "What are the titles of some James Joyce books?"
+
+# Searches started before the model asked for them, keyed by normalized query
+prefetched_searches = {}
+
+def normalize_query(search_terms):
+    return " ".join(" ".join(search_terms).lower().split())
+
+def guess_search_terms(task):
+    """Guess search terms from the task: the capitalized words after the first"""
+    words = [word.strip(string.punctuation) for word in task.split()[1:]]
+    return [word for word in words if word[:1].isupper()]
+
+def prefetch_search(search_terms):
+    """Start a search in the background so a matching tool call can reuse it"""
+    key = normalize_query(search_terms)
+    if key and key not in prefetched_searches:
+        prefetched_searches[key] = asyncio.create_task(fetch_books(" ".join(search_terms)))
+    return key
 
 # Tool definition
-def search_gutenberg_books(search_terms):
-    search_query = " ".join(search_terms)
+async def search_gutenberg_books(search_terms):
+    prefetched = prefetched_searches.pop(normalize_query(search_terms), None)
+    if prefetched is not None:
+        return await prefetched
+    return await fetch_books(" ".join(search_terms))
+
+async def fetch_books(search_query):
     url = "https://gutendex.com/books"
-    response = requests.get(url, params={"search": search_query})
-    simplified_results = []
-    for book in response.json().get("results", []):
-        simplified_results.append({
-            "id": book.get("id"),
-            "title": book.get("title"),
-            "authors": book.get("authors")
-        })
-    logger.info(f"Found {len(simplified_results)} books", simplified_results)
+    response = await http_client.get(url, params={"search": search_query})
+    books = _json.loads(response.content).get("results", [])
+    simplified_results = [
+        {"id": book.get("id"), "title": book.get("title"), "authors": book.get("authors")}
+        for book in books
+    ]
+    # Only formatted if an INFO sink is enabled
+    logger.opt(lazy=True).info(
+        "Found {count} books: {results}",
+        count=lambda: len(simplified_results),
+        results=lambda: simplified_results
+    )
     return simplified_results
 
 # Tool specification
@@ -66,8 +100,8 @@ tools = [
 TOOL_MAPPING = {"search_gutenberg_books": search_gutenberg_books}
 
 # Agentic loop functions
-def call_llm(msgs):
-    resp = openai_client.chat.completions.create(
+async def call_llm(msgs):
+    resp = await openai_client.chat.completions.create(
         model=MODEL,
         tools=tools,
         messages=msgs
@@ -91,35 +125,57 @@ def call_llm(msgs):
     msgs.append(message_dict)
     return resp
 
-def get_tool_response(response):
-    tool_call = response.choices[0].message.tool_calls[0]
+async def get_tool_responses(response):
+    # Run every requested tool call concurrently; each gets its own tool message
+    return await asyncio.gather(*[
+        run_tool(tool_call) for tool_call in response.choices[0].message.tool_calls
+    ])
+
+async def run_tool(tool_call):
     tool_name = tool_call.function.name
-    tool_args = json.loads(tool_call.function.arguments)
-    tool_result = TOOL_MAPPING[tool_name](**tool_args)
+    tool_args = _json.loads(tool_call.function.arguments)
+    tool_result = await TOOL_MAPPING[tool_name](**tool_args)
     return {
         "role": "tool",
         "tool_call_id": tool_call.id,
         "name": tool_name,
-        "content": json.dumps(tool_result),
+        "content": _json.dumps(tool_result).decode(),
     }
 
 # Main execution
-def main():
-    global messages
-    while True:
-        resp = call_llm(messages)
-        if resp.choices[0].message.tool_calls:
-            messages.append(get_tool_response(resp))
-        else:
-            break
-    
+async def main(task=TASK):
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": task}
+    ]
+
+    # Speculatively run the likely search while the model decides what to do;
+    # if its tool call asks for the same query, one round trip is saved
+    prefetch_key = prefetch_search(guess_search_terms(task))
+    try:
+        while True:
+            resp = await call_llm(messages)
+            if resp.choices[0].message.tool_calls:
+                messages.extend(await get_tool_responses(resp))
+            else:
+                break
+    finally:
+        unused = prefetched_searches.pop(prefetch_key, None)
+        if unused is not None:
+            unused.cancel()
+
+    return messages[-1]["content"]
+
+async def run_tasks(tasks):
+    """Run several independent tasks concurrently"""
+    return await asyncio.gather(*[main(t) for t in tasks])
+
+if __name__ == "__main__":
+    final_content = asyncio.run(main())
+
     # Print the final response
     print("Here are some books by James Joyce:")
-    final_content = messages[-1]["content"]
     if isinstance(final_content, str):
         print(final_content)
     else:
         print("Unexpected response format")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
@@ -1,9 +1,11 @@
 from src.brainstorm.agents import Agent, Tool
 from src.brainstorm.ai import AI
+from src.brainstorm import _json
+from src.brainstorm.formatting import StreamFormatter, format_response
+import asyncio
+import functools
 import os
-import re
 import sys
-import json
 import argparse
 from pathlib import Path
 from dotenv import load_dotenv
@@ -11,8 +13,6 @@ from rich import print
 from rich.panel import Panel
 from rich.console import Console
 from rich.prompt import Prompt
-from rich.text import Text
-from rich.style import Style
 from rich.live import Live
 
 load_dotenv()
@@ -22,53 +22,56 @@ HEADER = """
 [dim]A friendly AI companion powered by OpenRouter[/dim]
 """
 
-def load_agent_config(agent_name: str) -> dict:
-    """Load agent configuration from JSON file."""
-    config_path = Path(f"agents/{agent_name}.json")
-    if not config_path.exists():
-        raise FileNotFoundError(f"Agent config not found: {config_path}")
-    
-    with open(config_path) as f:
-        return json.load(f)
+AGENTS_DIR = Path("agents")
 
-def format_response(text):
-    """Format the response text to display italicized text in pink."""
-    # Create a Rich Text object
-    rich_text = Text()
-    
-    # Split the text by markdown-style italics
-    parts = re.split(r'(\*[^*]+\*|_[^_]+_)', text)
-    
-    for part in parts:
-        if part.startswith('*') and part.endswith('*'):
-            # Remove the asterisks and style the content
-            content = part[1:-1]
-            rich_text.append(content, style=Style(italic=True, color="magenta"))
-        elif part.startswith('_') and part.endswith('_'):
-            # Remove the underscores and style the content
-            content = part[1:-1]
-            rich_text.append(content, style=Style(italic=True, color="magenta"))
-        else:
-            # Regular text without styling
-            rich_text.append(part)
-    
-    return rich_text
+@functools.lru_cache(maxsize=1)
+def _agent_index(mtime):
+    """Map agent names to config paths for a given agents directory mtime."""
+    with os.scandir(AGENTS_DIR) as entries:
+        return {
+            entry.name[:-len(".json")]: Path(entry.path)
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        }
+
+def list_agents():
+    """Get the available agent configs, rescanning only when the directory changes."""
+    try:
+        mtime = AGENTS_DIR.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    return _agent_index(mtime)
 
-def format_stream_chunk(chunk, buffer=""):
-    """Format a single streaming chunk to handle italics."""
-    # Combine the buffer with the current chunk
-    full_text = buffer + chunk
+def load_agent_config(agent_name: str) -> dict:
+    """Load agent configuration from JSON file."""
+    config_path = list_agents().get(agent_name)
+    if config_path is None:
+        raise FileNotFoundError(f"Agent config not found: {AGENTS_DIR / agent_name}.json")
     
-    # Process the complete text with proper formatting
-    return format_response(full_text), full_text
+    # Parse the raw UTF-8 bytes directly instead of decoding to text first
+    return _json.loads(config_path.read_bytes())
 
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Chat with an AI agent")
     parser.add_argument("agent", nargs="?", default="catgirl", help="Agent name to use")
-    parser.add_argument("--stream", action="store_true", help="Use streaming mode")
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=True, help="Stream responses as they are generated (default: on)")
+    parser.add_argument("--batch", metavar="FILE", help="Run every prompt in FILE (one per line) concurrently and exit")
+    parser.add_argument("--qpm", type=int, default=500, help="Maximum number of requests started per minute for --batch")
     return parser.parse_args()
 
+async def run_batch(agent, prompts, qpm):
+    """Run prompts concurrently, each in its own conversation, starting at most qpm per minute."""
+    interval = 60 / max(1, qpm)
+
+    async def run_one(i, prompt):
+        # Stagger request starts evenly so the rate stays within the provider's limit
+        await asyncio.sleep(i * interval)
+        return await agent.arun(prompt)
+
+    tasks = [run_one(i, p) for i, p in enumerate(prompts)]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
 def main():
     args = parse_args()
     console = Console()
@@ -92,6 +95,18 @@ def main():
             default_model=config["ai_config"]["model"]
         )
 
+        if args.batch:
+            prompts = [line.strip() for line in Path(args.batch).read_text().splitlines() if line.strip()]
+            responses = asyncio.run(run_batch(agent, prompts, args.qpm))
+            for prompt, response in zip(prompts, responses):
+                console.print(f"[bold cyan]You[/bold cyan]: {prompt}")
+                if isinstance(response, Exception):
+                    console.print(f"[bold red]Error:[/bold red] {str(response)}")
+                else:
+                    console.print(f"[bold magenta]{config['name']}[/bold magenta]:", format_response(response))
+                console.print()
+            return
+
         # Create a single conversation ID to use for the entire session
         conversation_id = agent.init_conversation()
 
@@ -113,28 +128,20 @@ def main():
                     # Print the agent name on its own line first
                     console.print(f"[bold magenta]{config['name']}[/bold magenta]:")
                     
-                    # Initialize response buffer
-                    buffer = ""
+                    # Formats each chunk into one Text object as it arrives
+                    formatter = StreamFormatter()
                     
-                    # Create a Live display for formatted output
-                    with Live("", refresh_per_second=10, console=console) as live_display:
-                        # Stream handler function
-                        def handle_stream(chunk):
-                            nonlocal buffer
-                            # Update buffer with new chunk
-                            buffer += chunk
-                            # Format the entire accumulated text with proper handling of formatting
-                            formatted_text, _ = format_stream_chunk("", buffer)
-                            # Update the live display with formatted text
-                            live_display.update(formatted_text)
-                        
+                    # Live re-renders the formatter's Text on each refresh, so
+                    # chunks only need to be appended to it
+                    with Live(formatter.text, refresh_per_second=10, console=console):
                         # Run agent with streaming
                         agent.run(
                             user_input,
                             conversation_id=conversation_id,
                             stream=True,
-                            stream_handler=handle_stream
+                            stream_handler=formatter.feed
                         )
+                        formatter.finish()
                     
                     # Print a newline after streaming is done
                     console.print()
@@ -156,8 +163,8 @@ def main():
     except FileNotFoundError as e:
         console.print(f"[bold red]Error:[/bold red] {str(e)}")
         console.print("[yellow]Available agents:[/yellow]")
-        for file in Path("agents").glob("*.json"):
-            console.print(f"  - {file.stem}")
+        for name in sorted(list_agents()):
+            console.print(f"  - {name}")
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {str(e)}")
 
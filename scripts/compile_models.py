@@ -0,0 +1,41 @@
+"""
+Compiles src/brainstorm/models.json into src/brainstorm/models_data.py
+
+Run from the repository root after editing models.json:
+
+    uv run -m scripts.compile_models
+"""
+
+import json
+import pprint
+from pathlib import Path
+
+from src.brainstorm.models import MODELS_RESOURCE, normalize_models, source_hash
+
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "src" / "brainstorm"
+MODELS_PATH = PACKAGE_DIR / MODELS_RESOURCE
+OUTPUT_PATH = PACKAGE_DIR / "models_data.py"
+
+HEADER = '''"""
+Model catalog compiled from models.json by scripts/compile_models.py; do not edit
+"""
+
+'''
+
+
+def compile_models(models_path: Path = MODELS_PATH, output_path: Path = OUTPUT_PATH):
+    """Write the catalog in models_path as a Python module at output_path"""
+    with open(models_path, "rb") as f:
+        source = f.read()
+    models = normalize_models(json.loads(source))
+
+    with open(output_path, "w") as f:
+        f.write(HEADER)
+        f.write(f"SOURCE_HASH = {source_hash(source)!r}\n\n")
+        f.write(f"MODELS = {pprint.pformat(models, sort_dicts=False)}\n")
+
+
+if __name__ == "__main__":
+    compile_models()
+    print(f"Wrote {OUTPUT_PATH}")
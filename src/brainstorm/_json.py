@@ -0,0 +1,25 @@
+"""
+JSON helpers that use orjson when it is installed and fall back to the stdlib
+"""
+
+try:
+    import orjson
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 encoded JSON"""
+        return orjson.dumps(obj)
+
+except ImportError:
+    import json
+
+    def loads(data):
+        """Parse JSON from str or bytes"""
+        return json.loads(data)
+
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 encoded JSON"""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
@@ -0,0 +1,33 @@
+"""
+Shared base for the small named metadata objects (models, tools)
+"""
+
+
+class CachedMeta:
+    """Base for slotted metadata objects with a name, a description and a display string
+
+    Subclasses add their own slots (slotted dataclasses reuse these ones for
+    the name and description fields) and set the display string once at
+    construction with _cache_display, which str() and repr() return.
+    Copies and pickles only carry the fields, so the display string is
+    rebuilt on first use after one. _dict is left free for a subclass to
+    cache a dict form in, outside its dataclass fields; it is unset after a
+    copy too.
+    """
+    __slots__ = ("name", "description", "_display", "_dict")
+
+    def _format_display(self) -> str:
+        return self.name
+
+    def _cache_display(self):
+        # object.__setattr__ so frozen dataclass subclasses can set it too
+        object.__setattr__(self, "_display", self._format_display())
+
+    def __str__(self) -> str:
+        try:
+            return self._display
+        except AttributeError:
+            self._cache_display()
+            return self._display
+
+    __repr__ = __str__
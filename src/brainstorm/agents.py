@@ -1,9 +1,32 @@
+import sys
 import uuid
+from collections import OrderedDict
 from typing import List, Dict, Optional, Iterator, Union, Callable
 from src.brainstorm.ai import AI
+from src.brainstorm.cache import SemanticCache
 from src.brainstorm.tools import Tool
 
+# Message roles, interned so role lookups and comparisons are identity checks
+_ROLE_USER = sys.intern("user")
+_ROLE_ASSISTANT = sys.intern("assistant")
+_ROLE_SYSTEM = sys.intern("system")
+
+# Message and content item keys, interned so every dict shares the same key objects
+_ROLE = sys.intern("role")
+_CONTENT = sys.intern("content")
+_TYPE = sys.intern("type")
+_TEXT = sys.intern("text")
+_IMAGE_URL = sys.intern("image_url")
+
+
+def _text_block(text: str) -> List[Dict]:
+    """Wrap text as message content in AI API format"""
+    return [{_TYPE: _TEXT, _TEXT: text}]
+
+
 class Message:
+    __slots__ = ("_data", "_texts", "_image_urls")
+
     def __init__(self, role: str, content: Union[List[Dict], str]):
         """Initialize a message with content.
         Content can be either:
@@ -12,21 +35,52 @@ class Message:
           - {"type": "text", "text": str} for text content
           - {"type": "image_url", "image_url": {"url": str}} for image URLs
         """
-        self.role = role
-        
         # Handle string content by converting to proper format
         if isinstance(content, str):
-            self.content = [{"type": "text", "text": content}]
-        else:
-            self.content = content
+            content = _text_block(content)
+
+        # The message is stored in AI API format, so it can be sent without conversion
+        self._data = {_ROLE: sys.intern(role), _CONTENT: content}
+        self._index_content()
+
+    @property
+    def role(self) -> str:
+        return self._data[_ROLE]
+
+    @role.setter
+    def role(self, value: str):
+        self._data[_ROLE] = sys.intern(value)
+
+    @property
+    def content(self) -> List[Dict]:
+        return self._data[_CONTENT]
+
+    @content.setter
+    def content(self, value: List[Dict]):
+        self._data[_CONTENT] = value
+        self._index_content()
+
+    def to_dict(self) -> Dict:
+        """Get the message in AI API format (shared with the message, not a copy)"""
+        return self._data
 
     def get_text_content(self) -> List[str]:
         """Get all text content from the message"""
-        return [item["text"] for item in self.content if item["type"] == "text"]
+        return self._texts
 
     def get_image_urls(self) -> List[str]:
         """Get all image URLs from the message"""
-        return [item["image_url"]["url"] for item in self.content if item["type"] == "image_url"]
+        return self._image_urls
+
+    def _index_content(self):
+        """Collect the text and image URL items of the content in a single pass"""
+        self._texts = []
+        self._image_urls = []
+        for item in self._data[_CONTENT]:
+            if item[_TYPE] == _TEXT:
+                self._texts.append(item[_TEXT])
+            elif item[_TYPE] == _IMAGE_URL:
+                self._image_urls.append(item[_IMAGE_URL]["url"])
 
     def __str__(self) -> str:
         texts = self.get_text_content()
@@ -37,13 +91,34 @@ class Message:
         return self.__str__()
 
 class Conversation:
+    __slots__ = ("id", "messages", "_ai_view", "_last_by_role", "_first_by_role", "_role_counts")
+
     def __init__(self, id: str, messages: List[Message] = None):
         self.id = id
         self.messages = messages or []
 
+        # Messages in AI API format, kept in step with self.messages, after a
+        # slot for the system message
+        self._ai_view: List[Optional[Dict]] = [None, *(message.to_dict() for message in self.messages)]
+        # The first and most recent message and the message count for each role
+        self._last_by_role: Dict[str, Message] = {}
+        self._first_by_role: Dict[str, Message] = {}
+        self._role_counts: Dict[str, int] = {}
+        for message in self.messages:
+            self._index_message(message)
+
     def add_message(self, message: Message):
         """Add a message to the conversation"""
         self.messages.append(message)
+        self._ai_view.append(message.to_dict())
+        self._index_message(message)
+
+    def _index_message(self, message: Message):
+        """Update the per-role lookups for a new message"""
+        role = message.role
+        self._last_by_role[role] = message
+        self._first_by_role.setdefault(role, message)
+        self._role_counts[role] = self._role_counts.get(role, 0) + 1
 
     def get_messages(self) -> List[Message]:
         """Get all messages in the conversation"""
@@ -51,45 +126,135 @@ class Conversation:
 
     def format_for_ai(self) -> List[Dict]:
         """Format messages for AI API consumption"""
-        formatted_messages = []
-        
-        for message in self.messages:
-            # For text-only content with a single element, some providers expect a string
-            # instead of a list of content items (especially older OpenAI versions)
-            # However, for our current structure, we'll always use the content list format
-            formatted_messages.append({
-                "role": message.role,
-                "content": message.content
-            })
-            
-        return formatted_messages
+        # For text-only content with a single element, some providers expect a string
+        # instead of a list of content items (especially older OpenAI versions)
+        # However, for our current structure, we'll always use the content list format
+        return self._ai_view[1:]
+
+    def format_for_ai_with_system(self, system_msg: Dict) -> List[Dict]:
+        """Format messages for AI API consumption, preceded by a system message
+
+        The returned list is maintained incrementally by add_message and
+        shared with the conversation, so it must not be modified and is only
+        valid until the next message is added.
+        """
+        self._ai_view[0] = system_msg
+        return self._ai_view
         
     def clear(self):
         """Clear all messages from the conversation"""
         self.messages = []
+        self._ai_view = [None]
+        self._last_by_role = {}
+        self._first_by_role = {}
+        self._role_counts = {}
         
     def get_last_user_message(self) -> Optional[Message]:
         """Get the last user message in the conversation"""
-        for message in reversed(self.messages):
-            if message.role == "user":
-                return message
-        return None
+        return self._last_by_role.get(_ROLE_USER)
         
     def get_last_assistant_message(self) -> Optional[Message]:
         """Get the last assistant message in the conversation"""
-        for message in reversed(self.messages):
-            if message.role == "assistant":
-                return message
-        return None
+        return self._last_by_role.get(_ROLE_ASSISTANT)
+
+    def count(self, role: str) -> int:
+        """Get the number of messages with the given role"""
+        return self._role_counts.get(role, 0)
+
+    def first(self, role: str) -> Optional[Message]:
+        """Get the first message with the given role"""
+        return self._first_by_role.get(role)
+
+    def last(self, role: str) -> Optional[Message]:
+        """Get the most recent message with the given role"""
+        return self._last_by_role.get(role)
+
+class StreamingResponse:
+    """Iterator over a streamed response that reports the full text when the stream ends
+
+    on_complete is called exactly once with the text received and whether the
+    stream was exhausted, whether the caller reads to the end, closes the
+    iterator, or drops it (read part-way or not at all). Closing or dropping
+    it also closes the underlying stream.
+    """
+    __slots__ = ("_chunks", "_on_complete", "_parts", "_done")
+
+    def __init__(
+        self,
+        chunks: Iterator[str],
+        on_complete: Optional[Callable[[str, bool], None]] = None
+    ):
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._parts: List[str] = []
+        self._done = False
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if self._done:
+            raise StopIteration
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._finish(True)
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self._parts.append(chunk)
+        return chunk
+
+    def close(self):
+        """Stop reading the stream"""
+        if self._done:
+            return
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        self._finish(False)
+
+    def __del__(self):
+        self.close()
+
+    def _finish(self, complete: bool):
+        """Report the text received, once"""
+        if self._done:
+            return
+        self._done = True
+        if self._on_complete is not None:
+            self._on_complete("".join(self._parts), complete)
+
+    def result(self) -> str:
+        """Read the rest of the stream and return the full response"""
+        for _ in self:
+            pass
+        return "".join(self._parts)
 
 class Agent:
+    __slots__ = (
+        "_name",
+        "_description",
+        "tools",
+        "ai",
+        "default_model",
+        "_system_prompt",
+        "_system_msg",
+        "cache",
+        "conversations",
+        "_max_conversations"
+    )
+
     def __init__(
         self, 
         name: str, 
         description: str, 
         tools: List[Tool], 
         ai: AI = None,
-        default_model: str = None
+        default_model: str = None,
+        cache: Optional[SemanticCache] = None,
+        max_conversations: int = 1024
     ):
         self.name = name
         self.description = description
@@ -97,15 +262,39 @@ class Agent:
         self.ai = ai
         self.default_model = default_model or "meta-llama/llama-4-maverick:free"
 
-        # memories (id -> Conversation)
-        self.conversations = {}
+        # System prompt and the message wrapping it, built on first use and
+        # reset whenever the name or description changes
+        self._system_prompt = None
+        self._system_msg = None
+
+        # Reuses responses for opening prompts similar to earlier ones (keyed
+        # by the system prompt and the user message, so only first turns)
+        self.cache = cache
+
+        # memories (id -> Conversation), least recently used first; only the
+        # most recent max_conversations are kept
+        self.conversations: OrderedDict[str, Conversation] = OrderedDict()
+        self._max_conversations = max_conversations
         
     def init_conversation(self) -> str:
         """Initialize a new conversation and return its ID"""
         conversation_id = str(uuid.uuid4())
-        self.conversations[conversation_id] = Conversation(conversation_id, [])
+        self._add_conversation(Conversation(conversation_id, []))
         return conversation_id
 
+    def _add_conversation(self, conversation: Conversation):
+        """Store a conversation, evicting the least recently used ones over the limit"""
+        self.conversations[conversation.id] = conversation
+        self.conversations.move_to_end(conversation.id)
+        while len(self.conversations) > self._max_conversations:
+            self.conversations.popitem(last=False)
+
+    def _get_conversation(self, conversation_id: str) -> Conversation:
+        """Get a conversation and mark it as recently used"""
+        conversation = self.conversations[conversation_id]
+        self.conversations.move_to_end(conversation_id)
+        return conversation
+
     def run(
         self, 
         user_input: str, 
@@ -127,30 +316,24 @@ class Agent:
             **kwargs: Additional parameters to pass to the AI
             
         Returns:
-            Either a complete response string, or an iterator of response chunks
+            Either a complete response string, or a StreamingResponse iterator of response chunks
+            (whatever it yields is added to the conversation when it ends or is dropped; if it
+            yields nothing, no assistant message is added)
         """
         if not model:
             model = self.default_model
 
-        # Create or retrieve conversation
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
-            self.conversations[conversation_id] = Conversation(conversation_id, [])
-
-        conversation = self.conversations[conversation_id]
-        
-        # Add user message to conversation
-        conversation.add_message(Message(
-            role="user", 
-            content=[{"type": "text", "text": user_input}]
-        ))
+        conversation, messages_for_ai = self._start_turn(user_input, conversation_id)
 
-        # Prepare messages for AI
-        messages_for_ai = conversation.format_for_ai()
-        
-        # Add system message at the beginning
-        system_msg = {"role": "system", "content": [{"type": "text", "text": self.system_prompt}]}
-        messages_for_ai.insert(0, system_msg)
+        # Serve similar prompts from the cache when one is configured
+        cached = self._get_cached(conversation, model, user_input)
+        if cached is not None:
+            conversation.add_message(Message(role=_ROLE_ASSISTANT, content=cached))
+            if stream and stream_handler:
+                stream_handler(cached)
+            elif stream:
+                return StreamingResponse(iter([cached]))
+            return cached
         
         # Get response (streaming or complete)
         if stream:
@@ -161,39 +344,37 @@ class Agent:
                     model=model,
                     **kwargs
                 )
-                full_response = ""
+                parts: List[str] = []
                 for chunk in response_chunks:
-                    full_response += chunk
+                    parts.append(chunk)
                     stream_handler(chunk)
+                full_response = "".join(parts)
                 
                 # Add response to conversation
-                conversation.add_message(Message(
-                    role="assistant", 
-                    content=[{"type": "text", "text": full_response}]
-                ))
+                conversation.add_message(Message(role=_ROLE_ASSISTANT, content=full_response))
+                self._add_cached(conversation, model, user_input, full_response)
                 return full_response
             else:
-                # For returning an iterator, we need to collect all chunks and add to history
-                # Store the chunks while yielding them
-                def collect_and_yield():
-                    full_response = ""
-                    response_chunks = self.ai.get_streaming_response(
-                        messages_for_ai, 
-                        model=model,
-                        **kwargs
-                    )
-                    for chunk in response_chunks:
-                        full_response += chunk
-                        yield chunk
-                        
-                    # After all chunks are processed, add the full message to conversation
-                    # This runs when the iterator is exhausted
-                    conversation.add_message(Message(
-                        role="assistant", 
-                        content=[{"type": "text", "text": full_response}]
-                    ))
-                
-                return collect_and_yield()
+                # Return an iterator that adds the response to the history once
+                # the stream ends, even if the caller stops reading early
+                response_chunks = self.ai.get_streaming_response(
+                    messages_for_ai, 
+                    model=model,
+                    **kwargs
+                )
+
+                def add_response(full_response: str, complete: bool):
+                    # A stream dropped before any text arrived leaves the user
+                    # turn unanswered; an empty text block would be sent on
+                    # every later turn, and some providers reject those
+                    if not full_response:
+                        return
+                    conversation.add_message(Message(role=_ROLE_ASSISTANT, content=full_response))
+                    # Only complete responses are worth reusing
+                    if complete:
+                        self._add_cached(conversation, model, user_input, full_response)
+
+                return StreamingResponse(response_chunks, add_response)
         else:
             # Get complete response
             response = self.ai.get_response(
@@ -203,16 +384,120 @@ class Agent:
             )
             
             # Add response to conversation
-            conversation.add_message(Message(
-                role="assistant", 
-                content=[{"type": "text", "text": response}]
-            ))
+            conversation.add_message(Message(role=_ROLE_ASSISTANT, content=response))
+            self._add_cached(conversation, model, user_input, response)
             return response
 
+    async def arun(
+        self,
+        user_input: str,
+        conversation_id: str = None,
+        model: str = None,
+        **kwargs
+    ) -> str:
+        """
+        Run the agent with user input without blocking the event loop
+
+        Several calls can be awaited together with asyncio.gather, e.g. to
+        evaluate a batch of prompts against the same agent.
+
+        Args:
+            user_input: The user's input
+            conversation_id: The conversation ID (will be created if not provided)
+            model: The model to use (will use default if not provided)
+            **kwargs: Additional parameters to pass to the AI
+
+        Returns:
+            The complete response string
+        """
+        if not model:
+            model = self.default_model
+
+        conversation, messages_for_ai = self._start_turn(user_input, conversation_id)
+
+        response = self._get_cached(conversation, model, user_input)
+        if response is None:
+            response = await self.ai.aget_response(
+                messages_for_ai,
+                model=model,
+                **kwargs
+            )
+            self._add_cached(conversation, model, user_input, response)
+
+        # Add response to conversation
+        conversation.add_message(Message(role=_ROLE_ASSISTANT, content=response))
+        return response
+
+    def _start_turn(self, user_input: str, conversation_id: Optional[str]):
+        """Record the user input and return the conversation with the messages for the AI"""
+        # Create or retrieve conversation
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+            self._add_conversation(Conversation(conversation_id, []))
+
+        conversation = self._get_conversation(conversation_id)
+        
+        # Add user message to conversation
+        conversation.add_message(Message(role=_ROLE_USER, content=user_input))
+
+        # Prepare messages for AI, with the system message at the beginning
+        messages_for_ai = conversation.format_for_ai_with_system(self.system_message)
+        return conversation, messages_for_ai
+
+    def _get_cached(self, conversation: Conversation, model: str, user_input: str) -> Optional[str]:
+        """Look up a cached response for the user input, if caching applies to this turn"""
+        if not self._uses_cache(conversation):
+            return None
+        return self.cache.get(model, f"{self.system_prompt}\n{user_input}")
+
+    def _add_cached(self, conversation: Conversation, model: str, user_input: str, response: str):
+        """Store a response for the user input, if caching applies to this turn"""
+        if self._uses_cache(conversation):
+            self.cache.add(model, f"{self.system_prompt}\n{user_input}", response)
+
+    def _uses_cache(self, conversation: Conversation) -> bool:
+        """Whether the cache applies to the conversation's current turn
+
+        Cache keys hold no history, so only a conversation's first user turn,
+        whose reply depends on nothing else, is looked up or stored.
+        """
+        return self.cache is not None and conversation.count(_ROLE_USER) == 1
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str):
+        self._name = value
+        self._reset_system_prompt()
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @description.setter
+    def description(self, value: str):
+        self._description = value
+        self._reset_system_prompt()
+
+    @property
+    def system_message(self) -> Dict:
+        """Get the system message sent to the AI, rebuilt only when the prompt changes"""
+        if self._system_msg is None:
+            self._system_msg = {_ROLE: _ROLE_SYSTEM, _CONTENT: _text_block(self.system_prompt)}
+        return self._system_msg
+
     @property
     def system_prompt(self) -> str:
         """Get the system prompt for the agent"""
-        return f"You are {self.name}. Your goal is to be {self.description}"
+        if self._system_prompt is None:
+            self._system_prompt = f"You are {self.name}. Your goal is to be {self.description}"
+        return self._system_prompt
+
+    def _reset_system_prompt(self):
+        self._system_prompt = None
+        self._system_msg = None
 
     def __str__(self) -> str:
         return self.system_prompt
@@ -2,10 +2,16 @@
 Contains utilities to get intelligent responses from various AI providers
 """
 
-import json
-import os
-from typing import List, Dict, Optional, Callable, Protocol, Iterator, Union
-from openai import OpenAI
+import functools
+import hashlib
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Callable, Protocol, Iterator, Tuple, Union
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from src.brainstorm import _json, models
 from src.brainstorm.tools import Tool
 
 
@@ -19,29 +25,52 @@ DEFAULT_BASE_URLS = {
     "openrouter": "https://openrouter.ai/api/v1"
 }
 
+# Connection pool limits for the shared HTTP clients
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32)
+
+# At most this many (api_key, base_url) clients are kept for reuse; beyond
+# that the least recently used one is dropped from the pool
+MAX_SHARED_CLIENTS = 32
+
+# Batched streams yield early once this many characters are buffered
+STREAM_BATCH_MAX_CHARS = 2048
+
+_shared_clients: "OrderedDict[Tuple[str, Optional[str]], OpenAI]" = OrderedDict()
+_shared_clients_lock = threading.Lock()
+
 
 def load_models():
-    """Load models from JSON file"""
-    models_path = os.path.join(os.path.dirname(__file__), "models.json")
-    with open(models_path, "r") as f:
-        return json.load(f)
+    """Load models as raw dicts from the model catalog (including refreshed models)"""
+    return models.registry.raw_models
+
+
+@functools.lru_cache(maxsize=1)
+def _model_index(registry: models.ModelRegistry) -> Dict[Tuple[Optional[str], str], Dict]:
+    """Map (provider, model name) and (None, model name) to model info
+
+    Keyed on the registry, so a catalog refresh rebuilds the index.
+    """
+    index = {}
+    for provider, provider_models in registry.raw_models.items():
+        for model_name, model_info in provider_models.items():
+            index[(provider, model_name)] = model_info
+            # Without a provider, the first provider listing the model wins
+            index.setdefault((None, model_name), model_info)
+    return index
 
 
 def get_model_info(model_name: str, provider: str = None):
     """Get model info from the loaded models"""
-    models = load_models()
+    index = _model_index(models.registry)
     
     # If provider is specified, look in that provider's models
-    if provider and provider in models:
-        if model_name in models[provider]:
-            return models[provider][model_name]
+    if provider:
+        model_info = index.get((provider, model_name))
+        if model_info is not None:
+            return model_info
     
     # Otherwise search in all providers
-    for provider_models in models.values():
-        if model_name in provider_models:
-            return provider_models[model_name]
-    
-    return None
+    return index.get((None, model_name))
 
 
 class ProviderConfig:
@@ -52,23 +81,75 @@ class ProviderConfig:
         model: str,
         base_url: Optional[str] = None,
         extra_headers: Optional[Dict] = None,
-        name: str = "Unknown Provider"
+        name: str = "Unknown Provider",
+        provider: Optional[str] = None
     ):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
         self.extra_headers = extra_headers or {}
         self.name = name
+        # Provider key ("openai", "openrouter") to look the model up under first
+        self.provider = provider
         
         # Validate model
-        model_info = get_model_info(model)
-        if not model_info:
+        if not self.model_info:
             raise ValueError(f"Unknown model: {model}")
 
+    @functools.cached_property
+    def model_info(self) -> Optional[Dict]:
+        """Get the model info, looked up once per configuration"""
+        return get_model_info(self.model, self.provider)
+
+
+def _get_shared_client(api_key: str, base_url: Optional[str]) -> OpenAI:
+    """Get the process-wide OpenAI client for an API key and base URL
+
+    Sharing one client keeps its connection pool (and TLS sessions) warm
+    across every AI instance that talks to the same endpoint. OpenAI
+    clients are thread-safe, so instances can share them freely.
+    """
+    key = (api_key, base_url)
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is not None:
+            _shared_clients.move_to_end(key)
+            return client
+
+        http_client = httpx.Client(
+            limits=HTTP_LIMITS,
+            # HTTP/2 needs the optional h2 package
+            http2=importlib.util.find_spec("h2") is not None
+        )
+        client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=http_client
+        )
+        _shared_clients[key] = client
+        # Evicted clients are not closed, since AI instances may still hold them
+        while len(_shared_clients) > MAX_SHARED_CLIENTS:
+            _shared_clients.popitem(last=False)
+        return client
+
+
+def close_shared_clients():
+    """Close every pooled client and release its sockets (e.g. during teardown)"""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
+
 
 def create_openai_client(config: ProviderConfig) -> OpenAI:
     """Create an OpenAI client with the given configuration"""
-    return OpenAI(
+    return _get_shared_client(config.api_key, config.base_url)
+
+
+def create_async_openai_client(config: ProviderConfig) -> AsyncOpenAI:
+    """Create an async OpenAI client with the given configuration"""
+    return AsyncOpenAI(
         api_key=config.api_key,
         base_url=config.base_url
     )
@@ -90,109 +171,117 @@ def handle_response(response) -> str:
 def handle_streaming_response(response) -> Iterator[str]:
     """Handle streaming response from AI provider"""
     for chunk in response:
-        # Different providers may have different chunk formats
-        # We'll handle the most common ones here
-        
-        # Handle OpenAI-style streaming format
-        if hasattr(chunk, 'choices') and chunk.choices:
-            choice = chunk.choices[0]
-            
-            # Handle the delta format (newer OpenAI API)
-            if hasattr(choice, 'delta'):
-                delta = choice.delta
-                if hasattr(delta, 'content') and delta.content is not None:
-                    yield delta.content
-            
-            # Handle the message format (some APIs)
-            elif hasattr(choice, 'message'):
-                message = choice.message
-                if hasattr(message, 'content') and message.content is not None:
-                    yield message.content
-                    
-            # Handle text format (older APIs)
-            elif hasattr(choice, 'text'):
-                if choice.text:
-                    yield choice.text
-
-
-def create_provider(config: ProviderConfig) -> Dict:
-    """Create a provider from configuration"""
-    client = create_openai_client(config)
-    
-    def get_response(messages: List[Dict], **kwargs) -> str:
-        """Get a complete response from the provider"""
-        model = kwargs.pop('model', config.model)
-        stream_mode = kwargs.pop('stream', False)
-        
-        if stream_mode:
-            return get_streaming_response(messages, model=model, **kwargs)
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            extra_headers=config.extra_headers,
-            **kwargs
-        )
-        
-        return handle_response(response)
+        # Fast path for the OpenAI-style delta format, which nearly every
+        # provider uses; other chunk formats fall back to the generic probe
+        try:
+            choices = chunk.choices
+            if not choices:
+                continue
+            content = choices[0].delta.content
+        except AttributeError:
+            content = _get_chunk_content(chunk)
+
+        if content is not None:
+            yield content
+
+
+class ResponseStream:
+    """Iterator over the content chunks of a streamed response
+
+    close() releases the response's connection even if no chunk was read.
+    """
+    __slots__ = ("_response", "_chunks")
+
+    def __init__(self, response, chunks: Iterator[str]):
+        self._response = response
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        return next(self._chunks)
+
+    def close(self):
+        """Stop reading and close the response"""
+        self._chunks.close()
+        close = getattr(self._response, "close", None)
+        if close is not None:
+            close()
+
+
+def coalesce_chunks(
+    chunks: Iterator[str],
+    window_ms: float,
+    max_chars: int = STREAM_BATCH_MAX_CHARS
+) -> Iterator[str]:
+    """Join streamed chunks into one string per time window
+
+    A batch is yielded once window_ms has passed since the last one or it
+    holds at least max_chars characters; whatever is left is yielded when
+    the stream ends.
+    """
+    window = window_ms / 1000
+    buffer: List[str] = []
+    size = 0
+    last_flush = time.perf_counter()
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        now = time.perf_counter()
+        if size >= max_chars or now - last_flush >= window:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+            last_flush = now
+    if buffer:
+        yield "".join(buffer)
+
+
+def _get_chunk_content(chunk) -> Optional[str]:
+    """Get the content of a streamed chunk in any of the supported formats"""
+    # Different providers may have different chunk formats
+    # We'll handle the most common ones here
     
-    def get_streaming_response(messages: List[Dict], **kwargs) -> Iterator[str]:
-        """Get a streaming response from the provider"""
-        model = kwargs.pop('model', config.model)
+    # Handle OpenAI-style streaming format
+    if hasattr(chunk, 'choices') and chunk.choices:
+        choice = chunk.choices[0]
         
-        # Make sure we don't have stream in kwargs
-        if 'stream' in kwargs:
-            kwargs.pop('stream')
-            
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            extra_headers=config.extra_headers,
-            stream=True,
-            **kwargs
-        )
+        # Handle the delta format (newer OpenAI API)
+        if hasattr(choice, 'delta'):
+            return getattr(choice.delta, 'content', None)
         
-        return handle_streaming_response(response)
-    
-    def get_response_from_tool(tool: Tool, messages: List[Dict], **kwargs) -> Union[str, Iterator[str]]:
-        """Get a response using a tool"""
-        stream_mode = kwargs.get('stream', False)
-        if stream_mode:
-            return get_streaming_response(messages, **kwargs)
-        return get_response(messages, **kwargs)
-    
-    def get_version() -> str:
-        """Get the version of the provider"""
-        return f"{config.name} (Model: {config.model})"
-    
-    return {
-        'get_response': get_response,
-        'get_streaming_response': get_streaming_response,
-        'get_response_from_tool': get_response_from_tool,
-        'version': get_version
-    }
+        # Handle the message format (some APIs)
+        elif hasattr(choice, 'message'):
+            return getattr(choice.message, 'content', None)
+                
+        # Handle text format (older APIs)
+        elif hasattr(choice, 'text'):
+            return choice.text or None
+
+    return None
 
 
-def create_openai_provider(api_key: str, model: str = None) -> Dict:
-    """Create an OpenAI provider"""
+def create_openai_config(api_key: str, model: str = None) -> ProviderConfig:
+    """Create the configuration for an OpenAI provider"""
     if model is None:
         model = DEFAULT_MODELS["openai"]
         
-    config = ProviderConfig(
+    return ProviderConfig(
         api_key=api_key,
         model=model,
-        name="OpenAI Provider"
+        name="OpenAI Provider",
+        provider="openai"
     )
-    return create_provider(config)
 
 
-def create_openrouter_provider(
+def create_openrouter_config(
     api_key: str,
     model: str = None,
     site_url: Optional[str] = None,
     site_name: Optional[str] = None
-) -> Dict:
-    """Create an OpenRouter provider"""
+) -> ProviderConfig:
+    """Create the configuration for an OpenRouter provider"""
     if model is None:
         model = DEFAULT_MODELS["openrouter"]
         
@@ -202,24 +291,62 @@ def create_openrouter_provider(
     if site_name:
         extra_headers["X-Title"] = site_name
 
-    config = ProviderConfig(
+    return ProviderConfig(
         api_key=api_key,
         model=model,
         base_url=DEFAULT_BASE_URLS["openrouter"],
         extra_headers=extra_headers,
-        name="OpenRouter Provider"
+        name="OpenRouter Provider",
+        provider="openrouter"
     )
-    return create_provider(config)
+
+
+PROVIDER_CONFIGS = {
+    "openai": create_openai_config,
+    "openrouter": create_openrouter_config
+}
+
+
+def create_provider(config: ProviderConfig) -> "AI":
+    """Create an AI from a provider configuration"""
+    return AI.from_config(config)
+
+
+def create_openai_provider(api_key: str, model: str = None) -> "AI":
+    """Create an AI backed by OpenAI"""
+    return create_provider(create_openai_config(api_key, model))
+
+
+def create_openrouter_provider(
+    api_key: str,
+    model: str = None,
+    site_url: Optional[str] = None,
+    site_name: Optional[str] = None
+) -> "AI":
+    """Create an AI backed by OpenRouter"""
+    return create_provider(create_openrouter_config(api_key, model, site_url, site_name))
 
 
 class AI:
     """Main AI class that handles interactions with AI providers"""
-    def __init__(self, provider: str = "openai", **kwargs):
+    __slots__ = (
+        "provider_config",
+        "model_name",
+        "model_info",
+        "_client",
+        "_async_client",
+        "_request_kwargs",
+        "_response_cache",
+        "_response_cache_size"
+    )
+
+    def __init__(self, provider: str = "openai", response_cache_size: int = 128, **kwargs):
         """
         Initialize AI with specified provider
         
         Args:
             provider: The provider to use ("openai" or "openrouter")
+            response_cache_size: How many exact-match temperature=0 responses to keep (0 disables the cache)
             **kwargs: Provider-specific arguments
                 For OpenAI:
                     - api_key: Your OpenAI API key
@@ -230,42 +357,157 @@ class AI:
                     - site_url: Your site URL (optional)
                     - site_name: Your site name (optional)
         """
-        # Use default model if not specified
-        if 'model' not in kwargs:
-            kwargs['model'] = DEFAULT_MODELS.get(provider)
-            
-        if provider == "openai":
-            self.provider = create_openai_provider(**kwargs)
-        elif provider == "openrouter":
-            self.provider = create_openrouter_provider(**kwargs)
-        else:
+        if provider not in PROVIDER_CONFIGS:
             raise ValueError(f"Unknown provider: {provider}")
-            
+
+        config = PROVIDER_CONFIGS[provider](**kwargs)
+        self._setup(config, response_cache_size)
+
+    @classmethod
+    def from_config(cls, config: ProviderConfig, response_cache_size: int = 128) -> "AI":
+        """Create an AI directly from a provider configuration"""
+        ai = cls.__new__(cls)
+        ai._setup(config, response_cache_size)
+        return ai
+
+    def _setup(self, config: ProviderConfig, response_cache_size: int):
+        self.provider_config = config
+        self._client = create_openai_client(config)
+        # Created on the first async request, so sync-only use never builds
+        # an async client and its connection pool
+        self._async_client: Optional[AsyncOpenAI] = None
+        # Providers without extra headers leave the argument out entirely
+        self._request_kwargs = {"extra_headers": config.extra_headers} if config.extra_headers else {}
+
         # Store model info for reference
-        self.model_name = kwargs.get('model', DEFAULT_MODELS.get(provider))
-        self.model_info = get_model_info(self.model_name, provider)
+        self.model_name = config.model
+        self.model_info = config.model_info
 
-    def get_response(self, messages: List[Dict], **kwargs) -> Union[str, Iterator[str]]:
-        """Get a response from the AI"""
-        stream_mode = kwargs.get('stream', False)
-        if stream_mode:
+        # LRU cache of complete responses keyed by a hash of the request
+        self._response_cache: OrderedDict[str, str] = OrderedDict()
+        self._response_cache_size = response_cache_size
+
+    def get_response(
+        self,
+        messages: List[Dict],
+        stream: bool = False,
+        cacheable: bool = True,
+        **kwargs
+    ) -> Union[str, Iterator[str]]:
+        """
+        Get a response from the AI
+
+        With stream=True this returns an iterator of content chunks as they
+        are generated. Identical requests made with temperature=0 are
+        answered from an in-memory cache unless cacheable is False; any
+        other request samples, so it is never cached. Streaming requests are
+        never cached.
+        """
+        if stream:
             return self.get_streaming_response(messages, **kwargs)
-        return self.provider['get_response'](messages, **kwargs)
+
+        key = self._response_cache_key(messages, kwargs) if cacheable else None
+        if key is not None and key in self._response_cache:
+            self._response_cache.move_to_end(key)
+            return self._response_cache[key]
+
+        model = kwargs.pop('model', self.model_name)
+        response = handle_response(self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **self._request_kwargs,
+            **kwargs
+        ))
+        self._store_cached_response(key, response)
+        return response
+
+    async def aget_response(self, messages: List[Dict], cacheable: bool = True, **kwargs) -> str:
+        """Get a complete response from the AI asynchronously"""
+        key = self._response_cache_key(messages, kwargs) if cacheable else None
+        if key is not None and key in self._response_cache:
+            self._response_cache.move_to_end(key)
+            return self._response_cache[key]
+
+        model = kwargs.pop('model', self.model_name)
+        if self._async_client is None:
+            self._async_client = create_async_openai_client(self.provider_config)
+        response = handle_response(await self._async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **self._request_kwargs,
+            **kwargs
+        ))
+        self._store_cached_response(key, response)
+        return response
+
+    def _response_cache_key(self, messages: List[Dict], kwargs: Dict) -> Optional[str]:
+        """Hash a request into a cache key, or return None if it should not be cached"""
+        if self._response_cache_size <= 0:
+            return None
+        # Only deterministic requests can be replayed; without a temperature
+        # the provider samples at its default, so those are never cached
+        if kwargs.get('temperature') != 0:
+            return None
+        try:
+            payload = _json.dumps([self.model_name, kwargs, messages])
+        except TypeError:
+            # Requests with arguments that cannot be serialized are not cached
+            return None
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def _store_cached_response(self, key: Optional[str], response: str):
+        """Store a response under key, evicting the least recently used entries"""
+        if key is None:
+            return
+        self._response_cache[key] = response
+        while len(self._response_cache) > self._response_cache_size:
+            self._response_cache.popitem(last=False)
     
-    def get_streaming_response(self, messages: List[Dict], **kwargs) -> Iterator[str]:
-        """Get a streaming response from the AI"""
-        # Ensure stream is set to True
-        kwargs['stream'] = True
-        return self.provider['get_streaming_response'](messages, **kwargs)
+    def get_streaming_response(
+        self,
+        messages: List[Dict],
+        batch_window_ms: float = 0.0,
+        **kwargs
+    ) -> Iterator[str]:
+        """Get a streaming response from the AI
+
+        Always streams, so kwargs must not include 'stream'. With a positive
+        batch_window_ms, chunks arriving within that window are joined and
+        yielded together instead of one per token.
+        """
+        model = kwargs.pop('model', self.model_name)
+        response = self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **self._request_kwargs,
+            stream=True,
+            **kwargs
+        )
+        
+        chunks = handle_streaming_response(response)
+        if batch_window_ms > 0:
+            chunks = coalesce_chunks(chunks, batch_window_ms)
+        return ResponseStream(response, chunks)
 
-    def get_response_from_tool(self, tool: Tool, messages: List[Dict], **kwargs) -> Union[str, Iterator[str]]:
+    def get_response_from_tool(
+        self,
+        tool: Tool,
+        messages: List[Dict],
+        stream: bool = False,
+        **kwargs
+    ) -> Union[str, Iterator[str]]:
         """Get a response using a tool"""
-        return self.provider['get_response_from_tool'](tool, messages, **kwargs)
+        return self.get_response(messages, stream=stream, **kwargs)
+
+    @staticmethod
+    def close_shared_clients():
+        """Close every pooled client shared between AI instances"""
+        close_shared_clients()
 
     @property
     def version(self) -> str:
         """Get the version of the AI"""
-        return self.provider['version']()
+        return f"{self.provider_config.name} (Model: {self.provider_config.model})"
         
     @property
     def model_description(self) -> str:
@@ -275,4 +517,4 @@ class AI:
     @property
     def max_tokens(self) -> Optional[int]:
         """Get the maximum tokens for the current model"""
-        return self.model_info.get('max_tokens') if self.model_info else None
\ No newline at end of file
+        return self.model_info.get('max_tokens') if self.model_info else None
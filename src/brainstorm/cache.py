@@ -0,0 +1,127 @@
+"""
+Semantic cache that reuses AI responses for prompts similar to earlier ones
+"""
+
+import atexit
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.brainstorm import _json
+
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class SemanticCache:
+    """Cache of responses looked up by embedding similarity of the prompt
+
+    Each AI model gets its own FAISS index, so switching models never serves a
+    response produced by a different one. With a cache_dir, new entries are
+    written out by flush(), which also runs at interpreter exit. Requires the
+    optional faiss and sentence-transformers packages.
+    """
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        cache_dir: Optional[str] = None,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            threshold: Minimum cosine similarity for a cached response to be reused
+            cache_dir: Directory to persist the indexes in (in-memory only if not provided)
+            embedding_model: The sentence-transformers model used to embed prompts
+        """
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SemanticCache requires faiss and sentence-transformers "
+                "(uv sync --extra cache)"
+            ) from e
+
+        self._faiss = faiss
+        self._encoder = SentenceTransformer(embedding_model)
+        self._dimension = self._encoder.get_sentence_embedding_dimension()
+        self.threshold = threshold
+        self.cache_dir = cache_dir
+
+        # model name -> (index, responses in index order)
+        self._entries: Dict[str, Tuple[object, List[str]]] = {}
+        # The last prompt embedded, so a miss followed by add() embeds once
+        self._last_embedding = None
+        # Models with entries not yet written to cache_dir
+        self._dirty: Set[str] = set()
+
+        if cache_dir:
+            atexit.register(self.flush)
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Get the cached response for a similar prompt, or None on a miss"""
+        index, responses = self._load(model)
+        vector = self._embed(prompt)
+        if index.ntotal == 0:
+            return None
+
+        scores, ids = index.search(vector, 1)
+        if ids[0][0] != -1 and scores[0][0] >= self.threshold:
+            return responses[ids[0][0]]
+        return None
+
+    def add(self, model: str, prompt: str, response: str):
+        """Store a response for the given prompt"""
+        index, responses = self._load(model)
+        index.add(self._embed(prompt))
+        responses.append(response)
+
+        # Written out by flush(), keeping disk I/O off the response path
+        if self.cache_dir:
+            self._dirty.add(model)
+
+    def flush(self):
+        """Write the indexes of models with new entries to cache_dir"""
+        while self._dirty:
+            model = self._dirty.pop()
+            index, responses = self._entries[model]
+            index_path, responses_path = self._paths(model)
+            self._faiss.write_index(index, index_path)
+            with open(responses_path, "wb") as f:
+                f.write(_json.dumps(responses))
+
+    def _embed(self, prompt: str):
+        """Embed a prompt as a normalized float32 row vector"""
+        if self._last_embedding is not None and self._last_embedding[0] == prompt:
+            return self._last_embedding[1]
+
+        vector = self._encoder.encode([prompt], normalize_embeddings=True).astype("float32")
+        self._last_embedding = (prompt, vector)
+        return vector
+
+    def _load(self, model: str):
+        """Get the index and responses for a model, reading them from disk if persisted"""
+        if model not in self._entries:
+            index, responses = None, []
+            if self.cache_dir:
+                index_path, responses_path = self._paths(model)
+                if os.path.exists(index_path) and os.path.exists(responses_path):
+                    index = self._faiss.read_index(index_path)
+                    with open(responses_path, "rb") as f:
+                        responses = _json.loads(f.read())
+
+            if index is None:
+                # Inner product of normalized vectors is cosine similarity
+                index = self._faiss.IndexFlatIP(self._dimension)
+            self._entries[model] = (index, responses)
+
+        return self._entries[model]
+
+    def _paths(self, model: str) -> Tuple[str, str]:
+        """Get the index and responses file paths for a model"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        base = os.path.join(self.cache_dir, safe_name)
+        return f"{base}.faiss", f"{base}.json"
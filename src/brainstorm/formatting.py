@@ -0,0 +1,118 @@
+"""
+Formatting of AI responses for display in a Rich console
+"""
+
+import functools
+import re
+from typing import Tuple
+from rich.style import Style
+from rich.text import Text
+
+
+# Markdown-style italics (*text* or _text_) and the characters that open them
+_ITALIC_RE = re.compile(r'(\*[^*]+\*|_[^_]+_)')
+_MARKER_RE = re.compile(r'[*_]')
+ITALIC_STYLE = Style(italic=True, color="magenta")
+
+# Longest text whose parsed segments are memoized
+_CACHEABLE_LENGTH = 1024
+
+
+def _split_segments(text: str) -> Tuple[Tuple[str, bool], ...]:
+    """Split text into (content, is_italic) segments"""
+    segments = []
+    # split() alternates plain text with the italic spans the pattern matched;
+    # only those spans lose their markers, so stray markers stay visible
+    for i, part in enumerate(_ITALIC_RE.split(text)):
+        if i % 2:
+            # Remove the markers and style the content
+            segments.append((part[1:-1], True))
+        else:
+            # Regular text without styling
+            segments.append((part, False))
+    return tuple(segments)
+
+
+@functools.lru_cache(maxsize=256)
+def _split_segments_cached(text: str) -> Tuple[Tuple[str, bool], ...]:
+    return _split_segments(text)
+
+
+def format_response(text: str) -> Text:
+    """Format the response text to display italicized text in pink."""
+    if len(text) <= _CACHEABLE_LENGTH:
+        segments = _split_segments_cached(text)
+    else:
+        segments = _split_segments(text)
+
+    rich_text = Text()
+    for content, italic in segments:
+        rich_text.append(content, style=ITALIC_STYLE if italic else None)
+    return rich_text
+
+
+class StreamFormatter:
+    """Format a streamed response incrementally into a single Rich Text object.
+
+    Each chunk only scans the part of the stream that has not been formatted
+    yet. Text after an unclosed italic marker is shown as plain text until the
+    marker is closed, then restyled.
+    """
+
+    def __init__(self):
+        self.text = Text()
+        # Unformatted tail of the stream, always starting with an open marker
+        self._pending = ""
+
+    def feed(self, chunk: str) -> Text:
+        """Add a chunk to the stream and return the formatted text so far."""
+        pending = self._pending
+        if pending and pending[0] not in chunk:
+            # The open marker is still unclosed, so nothing can be restyled yet
+            self._pending = pending + chunk
+            self.text.append(chunk)
+            return self.text
+        return self._format(chunk)
+
+    def finish(self) -> Text:
+        """Flush the end of the stream, treating any unclosed marker as plain text."""
+        return self._format("", final=True)
+
+    def _format(self, chunk: str, final: bool = False) -> Text:
+        pending = self._pending
+        if pending:
+            # Drop the provisional plain rendering of the pending tail
+            self.text.right_crop(len(pending))
+
+        text = pending + chunk
+        pos = 0
+        while True:
+            marker = _MARKER_RE.search(text, pos)
+            if marker is None:
+                self._append_plain(text[pos:])
+                pos = len(text)
+                break
+
+            start = marker.start()
+            self._append_plain(text[pos:start])
+            match = _ITALIC_RE.match(text, start)
+            if match:
+                self.text.append(match.group()[1:-1], style=ITALIC_STYLE)
+                pos = match.end()
+            elif final or text[start + 1:start + 2] == text[start]:
+                # A doubled marker, or one still open when the stream ends,
+                # can never open an italic span
+                self.text.append(text[start])
+                pos = start + 1
+            else:
+                # The marker may still be closed by a later chunk
+                pos = start
+                break
+
+        self._pending = text[pos:]
+        self._append_plain(self._pending)
+        return self.text
+
+    def _append_plain(self, text: str):
+        if text:
+            self.text.append(text)
@@ -2,14 +2,32 @@
 Contains model definitions for various AI providers
 """
 
-import json
-import os
-from enum import Enum, auto
-from typing import Dict, Optional
+import functools
+import hashlib
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from importlib.resources import files
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
 
+import httpx
+from loguru import logger
 
-class ModelCategory(Enum):
-    """Categories of models based on their capabilities"""
+from src.brainstorm import _json
+from src.brainstorm._meta import CachedMeta
+
+# Catalog data in models.json format: provider -> model name -> fields
+RawCatalog = Dict[str, Dict[str, dict]]
+
+
+class ModelCategory(StrEnum):
+    """Categories of models based on their capabilities
+
+    Each member is the lowercase string models.json uses for it.
+    """
     GENERAL = auto()
     CODE = auto()
     VISION = auto()
@@ -18,69 +36,343 @@ class ModelCategory(Enum):
     EXPERIMENTAL = auto()
 
 
-class ModelInfo:
+@dataclass(slots=True, frozen=True, repr=False)
+class ModelInfo(CachedMeta):
     """Information about a specific model"""
-    def __init__(
-        self,
-        name: str,
-        provider: str,
-        category: ModelCategory,
-        description: str,
-        max_tokens: Optional[int] = None,
-        is_experimental: bool = False
-    ):
-        self.name = name
-        self.provider = provider
-        self.category = ModelCategory[category.upper()] if isinstance(category, str) else category
-        self.description = description
-        self.max_tokens = max_tokens
-        self.is_experimental = is_experimental
-
-    def __str__(self) -> str:
+    name: str
+    provider: str
+    category: ModelCategory
+    description: str
+    max_tokens: Optional[int] = None
+    is_experimental: bool = False
+
+    def __post_init__(self):
+        self._cache_display()
+
+    def _format_display(self) -> str:
         return f"{self.name} ({self.provider})"
 
-    def __repr__(self) -> str:
-        return self.__str__()
+    @property
+    def as_dict(self) -> dict:
+        """The model as a JSON-ready dict, built once and shared, so it must not be modified"""
+        try:
+            return self._dict
+        except AttributeError:
+            object.__setattr__(self, "_dict", {
+                "name": self.name,
+                "provider": self.provider,
+                "category": self.category.value,
+                "description": self.description,
+                "max_tokens": self.max_tokens,
+                "is_experimental": self.is_experimental
+            })
+            return self._dict
 
 
-def load_models() -> Dict[str, Dict[str, ModelInfo]]:
-    """Load models from models.json file"""
-    models_path = os.path.join(os.path.dirname(__file__), "models.json")
-    with open(models_path, "r") as f:
-        data = json.load(f)
-        
-    models = {}
-    for provider, provider_models in data.items():
-        models[provider] = {}
-        for model_name, model_data in provider_models.items():
-            models[provider][model_name] = ModelInfo(
+# Read as package data, so the catalog also loads from a zip or wheel
+MODELS_RESOURCE = "models.json"
+
+OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+# Fields a refresh keeps from the catalog for models it already lists
+_CURATED_FIELDS = ("category", "is_experimental")
+
+# Values for the optional fields of a catalog row
+_ROW_DEFAULTS = {"max_tokens": None, "is_experimental": False}
+
+# Names whose first characters match no known model are rejected up front
+_NAME_PREFIX_LENGTH = 4
+
+
+def source_hash(source: bytes) -> str:
+    """Hash the contents of models.json, to tell whether models_data.py is current"""
+    return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+
+def normalize_models(raw_models: RawCatalog) -> RawCatalog:
+    """Copy a catalog with every optional field filled in, so rows can be read without defaults"""
+    return {
+        provider: {
+            model_name: {**_ROW_DEFAULTS, **model_data}
+            for model_name, model_data in provider_models.items()
+        }
+        for provider, provider_models in raw_models.items()
+    }
+
+
+def _load_raw_models() -> RawCatalog:
+    """Load the model catalog without building any ModelInfo objects
+
+    The catalog compiled into models_data.py by scripts/compile_models.py is
+    used while it matches models.json, which skips parsing the JSON; after
+    models.json is edited the JSON is parsed until the module is regenerated.
+    Either way the catalog is normalized.
+    """
+    source = files(__package__).joinpath(MODELS_RESOURCE).read_bytes()
+
+    try:
+        from src.brainstorm import models_data
+    except ImportError:
+        models_data = None
+    if models_data is not None and models_data.SOURCE_HASH == source_hash(source):
+        # Normalized when it was compiled
+        return models_data.MODELS
+
+    return normalize_models(_json.loads(source))
+
+
+class ModelRegistry:
+    """The model catalog, loaded on first use
+
+    ModelInfo objects are only built when first asked for, and each index
+    over them is built once on first access.
+    """
+    def __init__(self, raw_models: Optional[RawCatalog] = None):
+        """
+        Initialize the registry
+
+        Args:
+            raw_models: The catalog in models.json format (read from models.json if not provided)
+        """
+        if raw_models is not None:
+            self.raw_models = normalize_models(raw_models)
+        self._models: Dict[Tuple[str, str], ModelInfo] = {}
+        self._providers: Dict[str, Dict[str, ModelInfo]] = {}
+
+    @functools.cached_property
+    def raw_models(self) -> RawCatalog:
+        return _load_raw_models()
+
+    @functools.cached_property
+    def by_provider(self) -> Dict[str, Dict[str, ModelInfo]]:
+        return {provider: self.provider_models(provider) for provider in self.raw_models}
+
+    @functools.cached_property
+    def all_models(self) -> Dict[str, ModelInfo]:
+        # Later providers win on duplicate names
+        return {
+            name: model
+            for provider_models in self.by_provider.values()
+            for name, model in provider_models.items()
+        }
+
+    @functools.cached_property
+    def as_dicts(self) -> Dict[str, Dict[str, dict]]:
+        return {
+            provider: {name: model.as_dict for name, model in provider_models.items()}
+            for provider, provider_models in self.by_provider.items()
+        }
+
+    @functools.cached_property
+    def by_category(self) -> Dict[ModelCategory, Dict[str, ModelInfo]]:
+        by_category: Dict[ModelCategory, Dict[str, ModelInfo]] = defaultdict(dict)
+        for name, model in self.all_models.items():
+            by_category[model.category][name] = model
+        return dict(by_category)
+
+    @functools.cached_property
+    def _name_prefixes(self) -> FrozenSet[str]:
+        return frozenset(
+            model_name[:_NAME_PREFIX_LENGTH]
+            for provider_models in self.raw_models.values()
+            for model_name in provider_models
+        )
+
+    def get(self, model_name: str) -> Optional[ModelInfo]:
+        """Get a model by name, or None if it is unknown"""
+        if model_name[:_NAME_PREFIX_LENGTH] not in self._name_prefixes:
+            return None
+
+        # Later providers take precedence, as they do in all_models
+        for provider, provider_models in reversed(self.raw_models.items()):
+            model_data = provider_models.get(model_name)
+            if model_data is not None:
+                return self._model(provider, model_name, model_data)
+        return None
+
+    def provider_models(self, provider: str) -> Dict[str, ModelInfo]:
+        """Get all models from a provider, building only that provider's models"""
+        models = self._providers.get(provider)
+        if models is None:
+            provider_models = self.raw_models.get(provider)
+            if provider_models is None:
+                return {}
+            # Built locally and stored once, with each row passed straight through
+            models = self._providers[provider] = {
+                model_name: self._model(provider, model_name, model_data)
+                for model_name, model_data in provider_models.items()
+            }
+        return models
+
+    def _model(self, provider: str, model_name: str, model_data: dict) -> ModelInfo:
+        """Build the ModelInfo for a provider's model row, or reuse the one already built"""
+        key = (provider, model_name)
+        model = self._models.get(key)
+        if model is None:
+            category_name = model_data["category"]
+            try:
+                category = ModelCategory(category_name)
+            except ValueError:
+                # Categories not written in lowercase, as in "GENERAL"
+                category = ModelCategory[category_name.upper()]
+            model = self._models[key] = ModelInfo(
                 name=model_name,
-                provider=provider,
-                category=model_data["category"],
+                # Providers repeat across models, so every model shares one string
+                provider=sys.intern(provider),
+                category=category,
                 description=model_data["description"],
-                max_tokens=model_data.get("max_tokens"),
-                is_experimental=model_data.get("is_experimental", False)
+                max_tokens=model_data["max_tokens"],
+                is_experimental=model_data["is_experimental"]
             )
-    return models
+        return model
+
+
+registry = ModelRegistry()
+
+# Catalog refreshes run one at a time; auto refresh is off unless enabled
+_refresh_lock = threading.Lock()
+_auto_refresh: Optional[Tuple[Callable[[], RawCatalog], float]] = None
+_loaded_at = time.monotonic()
+
+
+def load_models() -> Dict[str, Dict[str, ModelInfo]]:
+    """Load models from models.json file
+
+    Always returns the current catalog immediately. If auto refresh is
+    enabled and the catalog is older than its max age, a refresh is started
+    in the background and later calls see the new catalog once it lands.
+    """
+    if _auto_refresh is not None:
+        fetch, max_age = _auto_refresh
+        if time.monotonic() - _loaded_at > max_age:
+            refresh_models(fetch)
+    return registry.by_provider
+
+
+def refresh_models(
+    fetch: Callable[[], RawCatalog],
+    background: bool = True
+) -> Optional[threading.Thread]:
+    """
+    Replace providers in the catalog with freshly fetched ones
 
+    A failed fetch is logged and leaves the current catalog in place. The
+    refreshed catalog is also used by ai.get_model_info, so new models can
+    be used to create an AI.
 
-# Load models from JSON
-ALL_MODELS = {}
-PROVIDER_MODELS = load_models()
-for provider_models in PROVIDER_MODELS.values():
-    ALL_MODELS.update(provider_models)
+    Args:
+        fetch: Returns catalog data in models.json format, e.g. fetch_openrouter_models;
+            providers it returns replace the same providers in the catalog, others are kept
+        background: Fetch in a daemon thread and return it, serving the current
+            catalog until the fetch completes
 
+    Returns:
+        The refresh thread if run in the background, otherwise None
+    """
+    if not background:
+        _refresh(fetch)
+        return None
 
+    thread = threading.Thread(target=_refresh, args=(fetch,), daemon=True)
+    thread.start()
+    return thread
+
+
+def enable_auto_refresh(fetch: Callable[[], RawCatalog], max_age: float = 24 * 60 * 60):
+    """Refresh the catalog in the background from load_models once it is older than max_age seconds"""
+    global _auto_refresh
+    _auto_refresh = (fetch, max_age)
+
+
+def _refresh(fetch: Callable[[], RawCatalog]):
+    global registry, _loaded_at
+    # Skip if a refresh is already running; its result will be just as fresh
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        # Reset the age even if the fetch fails, which keeps the current
+        # catalog and retries only after another max_age
+        _loaded_at = time.monotonic()
+        try:
+            fetched = fetch()
+            current = registry.raw_models
+            raw_models = {**current, **{
+                provider: _keep_curated_fields(current.get(provider, {}), provider_models)
+                for provider, provider_models in fetched.items()
+            }}
+            new_registry = ModelRegistry(raw_models)
+            # Build every model now, so malformed rows fail here and not in readers
+            new_registry.by_category
+        except Exception as e:
+            logger.warning("Model catalog refresh failed, keeping the current catalog: {}", e)
+            return
+
+        # Swapping the reference is atomic, so readers see the old or new catalog
+        registry = new_registry
+        get_model_info.cache_clear()
+        get_models_by_category.cache_clear()
+    finally:
+        _refresh_lock.release()
+
+
+def _keep_curated_fields(current: Dict[str, dict], fetched: Dict[str, dict]) -> Dict[str, dict]:
+    """Keep the catalog's category and is_experimental for models it already lists"""
+    return {
+        model_name: {**model_data, **{
+            field_name: current[model_name][field_name]
+            for field_name in _CURATED_FIELDS
+            if field_name in current.get(model_name, {})
+        }}
+        for model_name, model_data in fetched.items()
+    }
+
+
+def fetch_openrouter_models() -> RawCatalog:
+    """Fetch the models OpenRouter currently offers, in models.json format"""
+    response = httpx.get(OPENROUTER_MODELS_URL, timeout=30)
+    response.raise_for_status()
+    return {
+        "openrouter": {
+            model["id"]: {
+                "name": model["id"],
+                "description": model.get("description") or model.get("name", ""),
+                "max_tokens": (model.get("top_provider") or {}).get("max_completion_tokens"),
+                # Provider listings carry no category; refreshes keep the
+                # catalog's own classification for models it already lists
+                "category": "general",
+                "is_experimental": False
+            }
+            for model in _json.loads(response.content)["data"]
+        }
+    }
+
+
+def __getattr__(name: str):
+    # The module-level tables are built on demand rather than at import
+    if name == "PROVIDER_MODELS":
+        return registry.by_provider
+    if name == "ALL_MODELS":
+        return registry.all_models
+    if name == "PROVIDER_MODELS_DICT":
+        return registry.as_dicts
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=256)
 def get_model_info(model_name: str) -> Optional[ModelInfo]:
     """Get information about a specific model"""
-    return ALL_MODELS.get(model_name)
+    return registry.get(model_name)
 
 
 def get_models_by_provider(provider: str) -> Dict[str, ModelInfo]:
     """Get all models from a specific provider"""
-    return PROVIDER_MODELS.get(provider, {})
+    return registry.provider_models(provider)
 
 
+@functools.lru_cache(maxsize=len(ModelCategory))
 def get_models_by_category(category: ModelCategory) -> Dict[str, ModelInfo]:
-    """Get all models in a specific category"""
-    return {name: model for name, model in ALL_MODELS.items() if model.category == category}
\ No newline at end of file
+    """Get all models in a specific category
+
+    The returned dict is shared between calls, so it must not be modified.
+    """
+    return registry.by_category.get(category, {})
@@ -0,0 +1,71 @@
+"""
+Model catalog compiled from models.json by scripts/compile_models.py; do not edit
+"""
+
+SOURCE_HASH = '34f721b59e18f9f12988e195cc17fde4'
+
+MODELS = {'openai': {'gpt-4o': {'max_tokens': 8192,
+                       'is_experimental': False,
+                       'name': 'gpt-4o',
+                       'description': 'Most capable GPT-4 model, optimized for '
+                                      'chat',
+                       'category': 'general'},
+            'gpt-4o-mini': {'max_tokens': 4096,
+                            'is_experimental': False,
+                            'name': 'gpt-4o-mini',
+                            'description': 'Smaller, faster version of GPT-4o '
+                                           'optimized for chat',
+                            'category': 'general'}},
+ 'openrouter': {'openai/gpt-4o': {'max_tokens': 8192,
+                                  'is_experimental': False,
+                                  'name': 'openai/gpt-4o',
+                                  'description': "OpenAI's GPT-4o model "
+                                                 'accessed through OpenRouter',
+                                  'category': 'general'},
+                'meta-llama/llama-4-maverick:free': {'max_tokens': 4096,
+                                                     'is_experimental': False,
+                                                     'name': 'meta-llama/llama-4-maverick:free',
+                                                     'description': "Meta's "
+                                                                    'Llama 4 '
+                                                                    'Maverick '
+                                                                    'model - '
+                                                                    'free tier',
+                                                     'category': 'general'},
+                'microsoft/wizardlm-2-8x22b': {'max_tokens': 4096,
+                                               'is_experimental': False,
+                                               'name': 'microsoft/wizardlm-2-8x22b',
+                                               'description': "Microsoft's "
+                                                              'WizardLM 2 '
+                                                              'model with 22B '
+                                                              'parameters',
+                                               'category': 'general'},
+                'rekaai/reka-flash-3:free': {'max_tokens': 4096,
+                                             'is_experimental': False,
+                                             'name': 'rekaai/reka-flash-3:free',
+                                             'description': 'Free version of '
+                                                            "Reka's Flash-3 "
+                                                            'model',
+                                             'category': 'general'},
+                'meta-llama/llama-4-scout': {'max_tokens': 4096,
+                                             'is_experimental': False,
+                                             'name': 'meta-llama/llama-4-scout',
+                                             'description': "Meta's Llama 4 "
+                                                            'Scout model',
+                                             'category': 'general'},
+                'openrouter/quasar-alpha': {'max_tokens': 32768,
+                                            'is_experimental': True,
+                                            'name': 'openrouter/quasar-alpha',
+                                            'description': 'A cloaked model '
+                                                           'provided to the '
+                                                           'community to '
+                                                           'gather feedback. '
+                                                           'Powerful, '
+                                                           'all-purpose model '
+                                                           'supporting '
+                                                           'long-context '
+                                                           'tasks, including '
+                                                           'code generation. '
+                                                           'All prompts and '
+                                                           'completions are '
+                                                           'logged.',
+                                            'category': 'experimental'}}}
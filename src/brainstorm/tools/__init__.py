@@ -1,9 +1,19 @@
 
+from dataclasses import dataclass
 from typing import Callable
 
+from src.brainstorm._meta import CachedMeta
 
-class Tool:
-    def __init__(self, name: str, description: str, function: Callable):
-        self.name = name
-        self.description = description
-        self.function = function
+
+@dataclass(slots=True, repr=False, eq=False)
+class Tool(CachedMeta):
+    name: str
+    description: str
+    function: Callable
+
+    # Tools are mutable, so the display string is the current name rather
+    # than one cached at construction
+    def __str__(self) -> str:
+        return self.name
+
+    __repr__ = __str__